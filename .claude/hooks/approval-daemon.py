@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+claps - 承認デーモン
+slack-approval.py から UNIX ドメインソケット経由で承認リクエストを受け取り、
+承認サーバーへの keep-alive 接続を使い回して転送する常駐プロセス
+
+- タスクごとに1つ起動（claps がタスク開始時に起動し、不在なら slack-approval.py が起動する）
+- ソケット: ~/.claps/{TASK_ID}.sock（所有者のみアクセス可能なディレクトリ内）
+- 一定時間リクエストがなければ自動終了
+- 複数の承認待ちを並行して保持し、同一内容の同時リクエストは1回の問い合わせにまとめる
+- CLAPS_APPROVAL_CACHE=1 なら、同一タスク内で許可済みの同一リクエストはサーバーに問い合わせず許可
+  （サーバー側でも自動許可されるので、省けるのは承認サーバーへの往復のみ）
+- Hook 本体のシム slack-approval.sh からの POST /hook には、即許可の判定も含めてこのプロセスで応答する
+  （claps がタスク開始時に起動しておき、Hook のたびに Python を起動しない）
+- 設定（タスクID・承認サーバーURL・トークンパス等）は slack-approval.py と共有する
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def _load_hook_module():
+    """同じディレクトリの slack-approval.py をモジュールとして読み込む"""
+    # worktree の .claude/hooks に __pycache__ を作らない
+    sys.dont_write_bytecode = True
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slack-approval.py')
+    spec = importlib.util.spec_from_file_location('slack_approval', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_hook = _load_hook_module()
+
+TASK_ID = _hook.TASK_ID
+AUTH_TOKEN_FILE = _hook.AUTH_TOKEN_FILE
+APPROVAL_TIMEOUT = _hook.APPROVAL_TIMEOUT
+
+# デーモンのソケットパス
+SOCKET_PATH = _hook.daemon_socket_path()
+
+# ソケットファイルの作成・削除を他のデーモンと排他するロックファイル（全タスク共通）
+SOCKET_LOCK_FILE = os.path.join(os.path.dirname(SOCKET_PATH), 'daemon.lock')
+
+# リクエストがないまま経過したら終了するまでの時間（秒）
+IDLE_TIMEOUT = 600
+
+# プールに保持する keep-alive 接続の上限
+POOL_MAXSIZE = 4
+
+# 承認サーバーへ同時に送るリクエストの上限（超えた分は空きを待つ）
+MAX_CONCURRENT_APPROVALS = 16
+
+# 許可済みリクエストのキャッシュ（明示的に有効化した場合のみ使用）
+# 承認サーバーも同一タスク内の許可済み内容は自動許可するので、省けるのは localhost への往復だけ
+# ファイルはタスク終了時に承認サーバーが削除する
+APPROVAL_CACHE_ENABLED = os.environ.get(f'{_hook.PROJECT.upper()}_APPROVAL_CACHE') == '1'
+APPROVAL_CACHE_FILE = os.path.join(
+    os.path.expanduser('~'), f'.{_hook.PROJECT}', 'approvals', f'{TASK_ID}.cache'
+)
+APPROVAL_CACHE_MAXSIZE = 256
+
+# シムが curl --unix-socket で送る Hook リクエストの先頭行
+HOOK_REQUEST_LINE = b'POST /hook '
+
+
+class ConnectionPool:
+    """承認サーバーへの keep-alive 接続プール"""
+
+    def __init__(self, maxsize: int):
+        self._connection_class, self._host, self._port, self.base_path = _hook.approval_server_address()
+        self._maxsize = maxsize
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        """接続を取得する（プールから再利用した場合は True を返す）"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connection_class(self._host, self._port, timeout=APPROVAL_TIMEOUT), False
+
+    def _release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self._maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def post(self, path: str, body: bytes, headers: dict) -> tuple[int, bytes]:
+        """POST リクエストを送信し、(ステータス, レスポンスボディ) を返す"""
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request('POST', self.base_path + path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                # サーバー側でアイドル切断された keep-alive 接続なら新しい接続でやり直す
+                if not reused:
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return response.status, data
+
+
+_pool = ConnectionPool(POOL_MAXSIZE)
+
+# デバッグログの書き出し（ローテートと追記）を1スレッドずつにする
+_debug_log_lock = threading.Lock()
+_approval_slots = threading.BoundedSemaphore(MAX_CONCURRENT_APPROVALS)
+
+
+# 認証トークンのキャッシュ（ファイルの更新時刻, トークン）
+_token_cache: tuple[int, bytes] = (0, b'')
+_token_lock = threading.Lock()
+
+
+def get_auth_token() -> bytes:
+    """認証トークンを読み込む（ファイルの更新時刻が変わったときだけ読み直す）"""
+    global _token_cache
+    try:
+        mtime_ns = os.stat(AUTH_TOKEN_FILE).st_mtime_ns
+    except OSError:
+        return b''
+    with _token_lock:
+        if mtime_ns != _token_cache[0]:
+            _token_cache = (mtime_ns, _hook.get_auth_token())
+        return _token_cache[1]
+
+
+def request_approval(tool_name: str, tool_input: dict) -> tuple[str, str]:
+    """承認サーバーに承認リクエストを送信し、(decision, reason) を返す"""
+    data = _hook.json_dumps({
+        "tool_name": tool_name,
+        "tool_input": tool_input
+    })
+
+    with _approval_slots:
+        return _hook.do_approval(data, get_auth_token(), _pool.post)
+
+
+def request_key(tool_name: str, tool_input: dict) -> bytes:
+    """ツール名と正規化した tool_input からリクエストのキーを作る"""
+    # orjson の有無でキーが変わらないよう、正規化には常に標準の json を使う
+    canonical = json.dumps(tool_input, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(tool_name.encode('utf-8') + b'\x00' + canonical, digest_size=16).digest()
+
+
+class InFlightRequests:
+    """同一キーのリクエストが処理中なら、新たに問い合わせず先行リクエストの結果を共有する"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result: tuple[str, str] | None = None
+            self.error: Exception | None = None
+
+    def __init__(self):
+        self._calls: dict[bytes, InFlightRequests._Call] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: bytes, func) -> tuple[str, str]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = InFlightRequests._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_in_flight = InFlightRequests()
+
+
+class ApprovalCache:
+    """同一タスク内で許可された (tool_name, tool_input) を記録する LRU キャッシュ
+
+    キーは追記専用ファイルに1行1件（16進）で保存し、デーモン再起動時に読み込む
+    """
+
+    def __init__(self, path: str, maxsize: int):
+        self._path = path
+        self._maxsize = maxsize
+        self._entries: OrderedDict[bytes, None] = OrderedDict()
+        self._file_lines = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                lines = f.read().split()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                key = bytes.fromhex(line)
+            except ValueError:
+                continue
+            if len(key) == 16:
+                self._entries[key] = None
+                self._entries.move_to_end(key)
+        self._file_lines = len(lines)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def contains(self, key: bytes) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key: bytes):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = None
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+            try:
+                os.makedirs(os.path.dirname(self._path), mode=0o700, exist_ok=True)
+                # 追記が溜まったら現在のエントリだけで書き直す
+                if self._file_lines >= self._maxsize * 2:
+                    with open(self._path, 'w') as f:
+                        f.write(''.join(k.hex() + '\n' for k in self._entries))
+                    self._file_lines = len(self._entries)
+                else:
+                    with open(self._path, 'a') as f:
+                        f.write(key.hex() + '\n')
+                    self._file_lines += 1
+            except OSError:
+                # 永続化できなくてもメモリ上のキャッシュは使える
+                pass
+
+
+_cache = ApprovalCache(APPROVAL_CACHE_FILE, APPROVAL_CACHE_MAXSIZE) if APPROVAL_CACHE_ENABLED else None
+
+
+def handle_approval(tool_name: str, tool_input: dict) -> tuple[str, str]:
+    """キャッシュと処理中のリクエストを確認し、なければ承認サーバーに問い合わせる"""
+    key = request_key(tool_name, tool_input)
+    if _cache is not None and _cache.contains(key):
+        return "allow", "Previously approved in this task"
+
+    decision, reason = _in_flight.run(key, lambda: request_approval(tool_name, tool_input))
+    if _cache is not None and decision == "allow":
+        _cache.add(key)
+    return decision, reason
+
+
+def _approve_or_deny(func) -> tuple[str, str]:
+    """func() の (decision, reason) を返す（想定外のエラーでも応答なしにせず deny を返す）"""
+    try:
+        return func()
+    except Exception as e:
+        return _hook.approval_failed(f"Unexpected error: {e}")
+
+
+class ApprovalHandler(socketserver.StreamRequestHandler):
+    """1接続 = 1リクエスト
+
+    - slack-approval.py からの承認リクエスト: JSON を送ってクライアントが書き込み側を閉じる
+    - シム（slack-approval.sh）からの POST /hook: Hook入力を受け取り、Claude CLI への出力をそのまま返す
+    """
+
+    def handle(self):
+        self.server.begin_request()
+        try:
+            line = self.rfile.readline()
+            if not line:
+                # 稼働確認のために接続してすぐ閉じたもの（is_daemon_running 等）には応答しない
+                return
+            if line.startswith(HOOK_REQUEST_LINE):
+                self.handle_hook()
+            else:
+                self.handle_forward(line + self.rfile.read())
+        finally:
+            self.server.end_request()
+            # 常駐プロセスなので終了時にまとめず、リクエストごとにデバッグログを書き出す
+            if _hook._debug_lines:
+                with _debug_log_lock:
+                    _hook._flush_debug_log()
+
+    def handle_forward(self, body: bytes):
+        try:
+            request = _hook.json_loads(body)
+        except ValueError:
+            decision, reason = _hook.approval_failed("Invalid request to approval daemon")
+        else:
+            decision, reason = _approve_or_deny(
+                lambda: handle_approval(request.get('tool_name', ''), request.get('tool_input', {}))
+            )
+        self.wfile.write(_hook.json_dumps({"permissionDecision": decision, "message": reason}))
+
+    def handle_hook(self):
+        headers = http.client.parse_headers(self.rfile)
+        try:
+            length = int(headers.get('Content-Length', ''))
+        except ValueError:
+            self.wfile.write(b'HTTP/1.1 411 Length Required\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            return
+        body = self.rfile.read(length)
+        output = _hook.hook_output(*_approve_or_deny(lambda: _hook.decide(body, handle_approval)))
+        self.wfile.write(
+            b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n'
+            b'Content-Length: ' + str(len(output)).encode('ascii') + b'\r\n\r\n' + output
+        )
+
+
+class ApprovalDaemon(socketserver.ThreadingUnixStreamServer):
+    """アイドル時間を追跡する承認デーモン"""
+
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        super().__init__(path, ApprovalHandler)
+        # 終了時に、自分がバインドしたソケットファイルかどうかを確かめるために控えておく
+        # （削除後に作り直されたファイルは同じ inode 番号を再利用することがあるので、作成時刻も比べる）
+        self._socket_id = _socket_file_id(path)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_activity = time.monotonic()
+
+    def begin_request(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def end_request(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_activity = time.monotonic()
+
+    def is_idle(self) -> bool:
+        with self._lock:
+            return self._in_flight == 0 and time.monotonic() - self._last_activity > IDLE_TIMEOUT
+
+    def remove_socket(self):
+        """自分がバインドしたソケットファイルだけを削除する（別のデーモンが作り直したものは消さない）"""
+        with _socket_lock():
+            try:
+                socket_id = _socket_file_id(self.server_address)
+            except FileNotFoundError:
+                return
+            if socket_id == self._socket_id:
+                os.unlink(self.server_address)
+
+
+def _socket_file_id(path: str) -> tuple[int, int, int]:
+    """ソケットファイルを識別する (デバイス, inode, 変更時刻) を返す"""
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino, stat.st_ctime_ns
+
+
+@contextmanager
+def _socket_lock():
+    """ソケットファイルの作成（bind から listen まで）・削除を他のデーモンと排他する"""
+    fd = os.open(SOCKET_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _is_daemon_alive() -> bool:
+    """既に別のデーモンがソケットで待ち受けているか確認する"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(SOCKET_PATH)
+            return True
+        except OSError:
+            return False
+
+
+def create_daemon() -> ApprovalDaemon | None:
+    """ソケットをバインドする（他のデーモンが稼働中なら None）"""
+    # ソケットファイルを所有者のみアクセス可能にする
+    os.umask(0o077)
+    os.makedirs(os.path.dirname(SOCKET_PATH), mode=0o700, exist_ok=True)
+    # ロック中は他のデーモンが bind から listen までの途中にいないので、接続できないソケットは古いものと判断できる
+    with _socket_lock():
+        try:
+            return ApprovalDaemon(SOCKET_PATH)
+        except OSError:
+            if _is_daemon_alive():
+                return None
+            # 前回のデーモンが残した古いソケットを削除して再試行
+            os.unlink(SOCKET_PATH)
+            return ApprovalDaemon(SOCKET_PATH)
+
+
+def main():
+    """メインエントリーポイント"""
+    if not TASK_ID:
+        exit(0)
+
+    daemon = create_daemon()
+    if daemon is None:
+        exit(0)
+
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    try:
+        while not daemon.is_idle():
+            time.sleep(5)
+    finally:
+        # 待ち受けを閉じる前に削除し、以降の Hook が接続せずに新しいデーモンを起動するようにする
+        daemon.remove_socket()
+        daemon.shutdown()
+        daemon.server_close()
+
+
+if __name__ == '__main__':
+    main()
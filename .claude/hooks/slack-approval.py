@@ -2,32 +2,95 @@
 """
 claps - Slack 承認 Hook スクリプト
 PreToolUse Hook として実行され、ツール使用の承認を制御する
+（通常はシム slack-approval.sh が起動済みの承認デーモンに転送し、デーモンに接続できないときだけ実行される）
 
 --dangerously-skip-permissions モードで動作:
 - 安全なツール（Read, Glob, Grep等）は即許可
 - mcp__claps-* ツールは即許可
+  （即許可のときも、承認デーモンが終了していれば起動し直す）
 - その他のツールは承認サーバー経由でSlack承認を求める
-- 承認サーバー接続失敗時は deny（安全側）
+  （承認デーモン approval-daemon.py があればソケット経由で転送し、なければ起動する）
+- 承認デーモンも同じ設定（下記の定数）をこのモジュールから読み込む
+- 承認サーバー接続失敗時は再試行し、それでも失敗すれば deny（安全側）
+  （失敗が続いたらサーキットブレーカーを開き、一定時間は問い合わせずに deny）
 """
 
-import json
+from __future__ import annotations
+
+# 即許可のパスで不要なモジュール（http.client, socket 等）は使う関数内で import する
+import atexit
 import os
+import re
 import sys
-import urllib.request
-import urllib.error
-from pathlib import Path
+
+# JSON のエンコードは orjson があれば C 実装を使う
+# デコードは orjson の有無で受け付ける入力や値（64ビットを超える整数等）が変わらないよう、常に標準の json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj) -> bytes:
+    """JSON にエンコードする（orjson が扱えない値は標準の json で）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # 64ビットを超える整数・対になっていないサロゲート等
+            pass
+    import json
+    return json.dumps(obj).encode('utf-8')
+
+
+def _reject_constant(name: str):
+    """NaN・Infinity・-Infinity を受け付けない"""
+    raise ValueError(f"Invalid JSON constant: {name}")
+
+
+def json_loads(data):
+    """JSON をデコードする（NaN・Infinity は orjson では null になってしまうので不正な入力として扱う）"""
+    import json
+    return json.loads(data, parse_constant=_reject_constant)
+
+# プロジェクト名（環境変数名・トークンディレクトリ・MCPプレフィックス等の共通部分）
+PROJECT = 'claps'
 
 # clapsタスクID（環境変数から取得、なければこのHookは無効）
-TASK_ID = os.environ.get('CLAPS_TASK_ID', '')
+TASK_ID = os.environ.get(f'{PROJECT.upper()}_TASK_ID', '')
 
 # 承認サーバーのURL
 APPROVAL_SERVER_URL = os.environ.get('APPROVAL_SERVER_URL', 'http://localhost:3001')
 
 # 認証トークンファイルのパス
-AUTH_TOKEN_FILE = Path.home() / '.claps' / 'auth-token'
+AUTH_TOKEN_FILE = os.path.join(os.path.expanduser('~'), f'.{PROJECT}', 'auth-token')
+AUTH_TOKEN_MAX_BYTES = 256
+
+# 即許可する MCP ツールのプレフィックス
+MCP_PREFIX = f'mcp__{PROJECT}-'
+
+# 承認デーモンのスクリプト
+DAEMON_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'approval-daemon.py')
+
+# 承認待ちの最大時間（秒）
+APPROVAL_TIMEOUT = 300
+
+# 接続エラー・5xx・429 の再試行（指数バックオフ + フルジッター）
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+
+# サーキットブレーカー（連続失敗で開き、開いている間は問い合わせずに deny）
+# 状態ファイルは claps の起動時に承認サーバーが削除する
+BREAKER_FILE = os.path.join(os.path.expanduser('~'), f'.{PROJECT}', 'breaker')
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_OPEN_SECONDS = 30
+
+# 起動した承認デーモンが待ち受けを始めるまで待つ最大時間（秒）
+DAEMON_STARTUP_TIMEOUT = 2.0
 
 # 安全なツール（即許可）
-SAFE_TOOLS = {
+SAFE_TOOLS = frozenset((
     'Read',
     'Glob',
     'Grep',
@@ -41,22 +104,167 @@ SAFE_TOOLS = {
     'TaskList',
     'TaskUpdate',
     'AskFollowupQuestion',
-}
+))
 
+# 即許可の判定を Hook入力のバイト列のまま行うための値（デコードを省く）
+SAFE_TOOLS_BYTES = frozenset(name.encode('utf-8') for name in SAFE_TOOLS)
+MCP_PREFIXES_BYTES = (MCP_PREFIX.encode('utf-8'),)
 
-def get_auth_token() -> str:
-    """認証トークンをファイルから読み込む"""
+# デバッグログ（CLAPS_DEBUG=1 のときだけ有効、上限を超えたら .1 にローテート）
+DEBUG_LOG_FILE = f'/tmp/{PROJECT}-hook-debug.log'
+DEBUG_LOG_MAX_BYTES = 1024 * 1024
+
+# Claude CLI が受け付ける permissionDecision
+DECISIONS = frozenset(('allow', 'deny', 'ask'))
+
+# 最も多い出力（理由なしの allow）は組み立て済みのバイト列をそのまま書き出す
+ALLOW_OUTPUT = (
+    b'{"hookSpecificOutput":{"hookEventName":"PreToolUse","permissionDecision":"allow",'
+    b'"permissionDecisionReason":""}}\n'
+)
+
+# 標準入力を読む単位（バイト）
+STDIN_CHUNK_SIZE = 4096
+
+# Hook入力から tool_name を取り出すパターン（エスケープを含む名前はフルパースに回す）
+TOOL_NAME_PATTERN = re.compile(rb'"tool_name"\s*:\s*"([^"\\]{1,128})"')
+TOOL_INPUT_PATTERN = re.compile(rb'"tool_input"\s*:')
+
+
+def get_auth_token() -> bytes:
+    """認証トークンをファイルから読み込む（短い ASCII なので固定長バッファへの1回の read で足りる）"""
     try:
-        return AUTH_TOKEN_FILE.read_text().strip()
-    except FileNotFoundError:
-        return ''
+        fd = os.open(AUTH_TOKEN_FILE, os.O_RDONLY)
+    except OSError:
+        return b''
+    try:
+        return os.read(fd, AUTH_TOKEN_MAX_BYTES).strip()
+    finally:
+        os.close(fd)
+
+
+# デバッグログのバッファ（無効時は None、終了時に1回の write でまとめて書き出す）
+_debug_lines: list[str] | None = [] if os.environ.get(f'{PROJECT.upper()}_DEBUG') == '1' else None
 
 
 def _debug_log(msg: str):
-    """デバッグログを /tmp に書き出す"""
+    """デバッグログをバッファに追加する"""
+    if _debug_lines is None:
+        return
     import datetime
-    with open('/tmp/claps-hook-debug.log', 'a') as f:
-        f.write(f"{datetime.datetime.now()} {msg}\n")
+    _debug_lines.append(f"{datetime.datetime.now()} {msg}\n")
+
+
+def _flush_debug_log():
+    """バッファしたデバッグログを /tmp に書き出す"""
+    if not _debug_lines:
+        return
+    # デーモンでは書き出し中も他のスレッドが追記するので、取り出した分だけをバッファから除く
+    lines = _debug_lines[:]
+    del _debug_lines[:len(lines)]
+    try:
+        try:
+            if os.stat(DEBUG_LOG_FILE).st_size > DEBUG_LOG_MAX_BYTES:
+                os.replace(DEBUG_LOG_FILE, DEBUG_LOG_FILE + '.1')
+        except FileNotFoundError:
+            pass
+        fd = os.open(DEBUG_LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, ''.join(lines).encode('utf-8'))
+        finally:
+            os.close(fd)
+    except OSError:
+        # デバッグログの失敗で Hook の結果に影響を与えない
+        pass
+
+
+if _debug_lines is not None:
+    atexit.register(_flush_debug_log)
+
+
+def read_until_tool_name() -> bytearray:
+    """tool_name（または tool_input キー）が現れるまで標準入力を読む"""
+    buf = bytearray()
+    while chunk := os.read(0, STDIN_CHUNK_SIZE):
+        buf += chunk
+        # tool_input キーより後ろに読み進めてもトップレベルの tool_name は得られない
+        if TOOL_NAME_PATTERN.search(buf) or TOOL_INPUT_PATTERN.search(buf):
+            break
+    return buf
+
+
+def read_stdin_rest(buf: bytearray) -> bytearray:
+    """標準入力の残りを EOF まで読んで buf に追加する"""
+    while chunk := os.read(0, 65536):
+        buf += chunk
+    return buf
+
+
+def discard_stdin():
+    """標準入力の残りを読み捨てる（書き込み側の Claude CLI に EPIPE を返さないため）"""
+    while os.read(0, 65536):
+        pass
+
+
+def peek_tool_name(raw_input: bytearray) -> bytes | None:
+    """JSON をパースせずに tool_name をバイト列のまま取り出す（取り出せなければ None）"""
+    match = TOOL_NAME_PATTERN.search(raw_input)
+    if not match:
+        return None
+    # tool_input 内にネストした tool_name キーを誤って拾わないよう、tool_input より前のものだけ採用
+    if TOOL_INPUT_PATTERN.search(raw_input, 0, match.start()):
+        return None
+    return match.group(1)
+
+
+def is_auto_allowed(tool_name_bytes: bytes) -> bool:
+    """安全なツールと mcp__claps-* ツールは承認なしで許可する（バイト列のまま判定）"""
+    return tool_name_bytes in SAFE_TOOLS_BYTES or tool_name_bytes.startswith(MCP_PREFIXES_BYTES)
+
+
+def decide(raw_input: bytes, approve) -> tuple[str, str]:
+    """Hook入力全体から (decision, reason) を決める（この Hook とデーモンで共通）
+
+    即許可でないツールは approve(tool_name, tool_input) で承認を求める
+    """
+    input_data = None
+    tool_name_bytes = peek_tool_name(raw_input)
+    if tool_name_bytes is None:
+        try:
+            input_data = json_loads(raw_input)
+        except ValueError:
+            _debug_log("[ERROR] JSON parse error")
+            return "deny", "JSON parse error"
+        if not isinstance(input_data, dict) or not isinstance(input_data.get('tool_name', ''), str):
+            _debug_log("[ERROR] Hook input is not an object")
+            return "deny", "Invalid hook input"
+        tool_name_bytes = input_data.get('tool_name', '').encode('utf-8')
+
+    if is_auto_allowed(tool_name_bytes):
+        if _debug_lines is not None:
+            _debug_log(f"[ALLOW] Safe or MCP tool: {tool_name_bytes.decode('utf-8')}")
+        return "allow", ""
+
+    tool_name = tool_name_bytes.decode('utf-8')
+    _debug_log(f"[TOOL] tool_name='{tool_name}'")
+
+    # 承認サーバーに転送するため、ここで初めてフルパースする
+    if input_data is None:
+        try:
+            input_data = json_loads(raw_input)
+        except ValueError:
+            _debug_log("[ERROR] JSON parse error")
+            return "deny", "JSON parse error"
+        if not isinstance(input_data, dict):
+            _debug_log("[ERROR] Hook input is not an object")
+            return "deny", "Invalid hook input"
+    tool_input = input_data.get('tool_input', {})
+
+    # その他のツールは承認サーバーに問い合わせ
+    _debug_log(f"[APPROVAL] Requesting approval for: {tool_name}")
+    decision, reason = approve(tool_name, tool_input)
+    _debug_log(f"[RESULT] decision='{decision}' reason='{reason}'")
+    return decision, reason
 
 
 def main():
@@ -68,85 +276,308 @@ def main():
         _debug_log("[EXIT] No TASK_ID, exiting")
         exit(0)
 
-    print("[Hook] slack-approval.py started", file=sys.stderr)
+    os.write(2, b"[Hook] slack-approval.py started\n")
 
-    # 標準入力からHook入力を読み取る
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        _debug_log("[ERROR] JSON parse error")
-        output_result("deny", "JSON parse error")
+    # 標準入力は tool_name が判明するところまで読み、即許可のツールなら JSON 全体を読まない
+    raw_input = read_until_tool_name()
+    tool_name_bytes = peek_tool_name(raw_input)
+    if tool_name_bytes is not None and is_auto_allowed(tool_name_bytes):
+        if _debug_lines is not None:
+            _debug_log(f"[ALLOW] Safe or MCP tool: {tool_name_bytes.decode('utf-8')}")
+        output_result("allow")
+        discard_stdin()
+        # アイドル終了したデーモンを起動し直し、以降の Hook をシムから転送できるようにする
+        if not is_daemon_running():
+            _debug_log("[DAEMON] Not running, spawning")
+            spawn_daemon()
         return
 
-    tool_name = input_data.get('tool_name', '')
-    tool_input = input_data.get('tool_input', {})
-    _debug_log(f"[TOOL] tool_name='{tool_name}'")
+    try:
+        decision, reason = decide(read_stdin_rest(raw_input), request_approval)
+    except Exception as e:
+        # 想定外のエラーで Hook が異常終了すると承認なしでツールが実行されるので、必ず deny を返す
+        _debug_log(f"[ERROR] Approval failed: {e!r}")
+        decision, reason = approval_failed(f"Unexpected error: {e}")
+    output_result(decision, reason)
 
-    # 安全なツールは即許可
-    if tool_name in SAFE_TOOLS:
-        _debug_log(f"[ALLOW] Safe tool: {tool_name}")
-        output_result("allow")
+
+def _read_breaker() -> dict:
+    """サーキットブレーカーの状態を読み込む（読めなければ閉じた状態とみなす）"""
+    try:
+        with open(BREAKER_FILE, 'rb') as f:
+            state = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_breaker(state: str, opened_at: float, failure_count: int):
+    """サーキットブレーカーの状態を書き込む
+
+    他の Hook プロセスやデーモンが書きかけの内容を読まないよう、一時ファイルに書いてから置き換える
+    """
+    import tempfile
+
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(BREAKER_FILE), prefix='breaker.')
+    except OSError:
         return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json_dumps({"state": state, "opened_at": opened_at, "failure_count": failure_count}))
+        os.replace(tmp_path, BREAKER_FILE)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
-    # mcp__claps-* ツールは即許可
-    if tool_name.startswith('mcp__claps-'):
-        _debug_log(f"[ALLOW] MCP tool: {tool_name}")
-        output_result("allow")
+
+def breaker_is_open() -> bool:
+    """ブレーカーが開いていて、まだ再試行を許す時間に達していなければ True"""
+    import time
+
+    state = _read_breaker()
+    if state.get('state') != 'open':
+        return False
+    return time.time() - state.get('opened_at', 0) < BREAKER_OPEN_SECONDS
+
+
+def record_approval_result(success: bool):
+    """承認サーバーへの問い合わせ結果をブレーカーに記録する"""
+    import time
+
+    state = _read_breaker()
+    if success:
+        if state.get('failure_count'):
+            _write_breaker('closed', 0, 0)
         return
 
-    # その他のツールは承認サーバーに問い合わせ
-    _debug_log(f"[APPROVAL] Requesting approval for: {tool_name}")
+    failure_count = state.get('failure_count', 0) + 1
+    if failure_count >= BREAKER_FAILURE_THRESHOLD:
+        _write_breaker('open', time.time(), failure_count)
+    else:
+        _write_breaker('closed', 0, failure_count)
+
+
+def approval_failed(message: str) -> tuple[str, str]:
+    """承認リクエスト失敗時の (decision, reason) を返す"""
+    return "deny", f"Approval request failed: {message}"
+
+
+def parse_approval_response(body: bytes) -> tuple[str, str]:
+    """承認サーバー（またはデーモン）のレスポンスを (decision, reason) にする"""
     try:
-        result = request_approval(tool_name, tool_input)
-        decision = result.get("permissionDecision", "deny")
-        reason = result.get("message", "")
-        _debug_log(f"[RESULT] decision='{decision}' reason='{reason}'")
-        output_result(decision, reason)
-    except Exception as e:
-        _debug_log(f"[ERROR] Approval failed: {e}")
-        output_result("deny", f"Approval request failed: {str(e)}")
+        result = json_loads(body)
+    except ValueError:
+        return approval_failed("Invalid approval response")
+    if not isinstance(result, dict):
+        return approval_failed("Invalid approval response")
+    # 型の違う値をそのまま返すと出力時に例外になり、Hook が何も出力せず終了してしまう
+    decision = result.get("permissionDecision", "deny")
+    if not isinstance(decision, str) or decision not in DECISIONS:
+        return approval_failed("Invalid approval response")
+    message = result.get("message", "")
+    return decision, message if isinstance(message, str) else ""
 
 
-def request_approval(tool_name: str, tool_input: dict) -> dict:
-    """承認サーバーに承認リクエストを送信する"""
-    url = f"{APPROVAL_SERVER_URL}/approve"
+def do_approval(data: bytes, auth_token: bytes, post) -> tuple[str, str]:
+    """/approve に POST して (decision, reason) を返す（デーモンと直接送信で共通）
 
-    data = json.dumps({
-        "tool_name": tool_name,
-        "tool_input": tool_input
-    }).encode('utf-8')
+    post(パス, ボディ, ヘッダー) は (ステータス, レスポンスボディ) を返す。
+    接続エラー・不正な HTTP レスポンス・5xx・429 は再試行する。401/403 等の 4xx と、承認待ちのタイムアウトは再試行しない
+    """
+    import http.client
+    import random
+    import socket
+    import time
 
-    # 認証トークンを取得
-    auth_token = get_auth_token()
     if not auth_token:
-        raise Exception("Auth token not found. Is claps running?")
+        return approval_failed(f"Auth token not found. Is {PROJECT} running?")
+    if breaker_is_open():
+        return approval_failed("Approval server unavailable (circuit breaker open)")
 
     headers = {
         'Content-Type': 'application/json',
         'X-Auth-Token': auth_token
     }
 
-    request = urllib.request.Request(url, data=data, headers=headers, method='POST')
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            status, body = post('/approve', data, headers)
+        except socket.timeout as e:
+            return approval_failed(f"Approval timed out: {e}")
+        except OSError as e:
+            error = f"Connection error: {e}"
+        except http.client.HTTPException as e:
+            # 不正なステータス行・途中で切れたボディ等も接続エラーと同様に再試行し、ブレーカーに数える
+            error = f"Invalid HTTP response: {type(e).__name__}: {e}"
+        else:
+            if status < 400:
+                record_approval_result(True)
+                return parse_approval_response(body)
+            error = f"HTTP error: {status}"
+            if status != 429 and status < 500:
+                return approval_failed(error)
+
+        if attempt + 1 < RETRY_ATTEMPTS:
+            time.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)))
+
+    record_approval_result(False)
+    return approval_failed(error)
+
+
+def request_approval(tool_name: str, tool_input: dict) -> tuple[str, str]:
+    """承認リクエストを送信する（デーモン経由、不在ならデーモンを起動してから転送）"""
+    data = json_dumps({
+        "tool_name": tool_name,
+        "tool_input": tool_input
+    })
+
+    try:
+        return request_via_daemon(data)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    except OSError as e:
+        return approval_failed(f"Approval daemon error: {e}")
+
+    _debug_log("[DAEMON] Not running, spawning")
+    spawn_daemon()
+    try:
+        result = wait_and_request_via_daemon(data)
+    except OSError as e:
+        return approval_failed(f"Approval daemon error: {e}")
+    if result is not None:
+        return result
+
+    # デーモンが起動しなければ、この Hook プロセスで直接承認を待つ
+    _debug_log("[DAEMON] Not available, falling back to direct request")
+    return request_direct(data)
+
+
+def daemon_socket_path() -> str:
+    """承認デーモンのソケットパスを返す
+
+    共有の一時ディレクトリではなく所有者のみの ~/.claps に置き、他のユーザーが先にバインドできないようにする
+    """
+    return os.path.join(os.path.expanduser('~'), f'.{PROJECT}', f'{TASK_ID}.sock')
+
+
+def is_daemon_running() -> bool:
+    """承認デーモンがソケットで待ち受けているか確認する（ソケットファイルがあっても応答しなければ False）"""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.setblocking(False)
+        try:
+            sock.connect(daemon_socket_path())
+        except (FileNotFoundError, ConnectionRefusedError):
+            # ソケットがない、または SIGKILL 等で終了したデーモンの古いソケットが残っている
+            return False
+        except OSError:
+            # 待ち受けキューが埋まっている等（デーモンは稼働中）
+            return True
+    return True
+
+
+def request_via_daemon(data: bytes) -> tuple[str, str]:
+    """承認デーモンに UNIX ドメインソケット経由でリクエストを転送する"""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(APPROVAL_TIMEOUT + 10)
+        sock.connect(daemon_socket_path())
+        sock.sendall(data)
+        sock.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    return parse_approval_response(b''.join(chunks))
+
+
+def wait_and_request_via_daemon(data: bytes) -> tuple[str, str] | None:
+    """起動直後の承認デーモンに接続できるまで待って転送する（時間内に接続できなければ None）"""
+    import time
+
+    # 接続できるまではリクエストを送っていないので、再試行しても二重送信にならない
+    deadline = time.monotonic() + DAEMON_STARTUP_TIMEOUT
+    while True:
+        try:
+            return request_via_daemon(data)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+
+def spawn_daemon():
+    """承認デーモンをバックグラウンドで起動する（Hook プロセス終了後も常駐）"""
+    import subprocess
 
     try:
-        with urllib.request.urlopen(request, timeout=300) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result
-    except urllib.error.HTTPError as e:
-        raise Exception(f"HTTP error: {e.code}")
-    except urllib.error.URLError as e:
-        raise Exception(f"URL error: {e.reason}")
+        subprocess.Popen(
+            [sys.executable, DAEMON_SCRIPT],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError as e:
+        _debug_log(f"[DAEMON] Spawn failed: {e}")
+
+
+def approval_server_address() -> tuple[type, str, int | None, str]:
+    """APPROVAL_SERVER_URL を (接続クラス, ホスト, ポート, ベースパス) に分解する"""
+    import http.client
+    import urllib.parse
+
+    parsed = urllib.parse.urlsplit(APPROVAL_SERVER_URL)
+    connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+    return connection_class, parsed.hostname or 'localhost', parsed.port, parsed.path.rstrip('/')
+
+
+def request_direct(data: bytes) -> tuple[str, str]:
+    """承認サーバーに直接承認リクエストを送信する（urllib のオープナーを通さず http.client で1回だけ POST）"""
+    try:
+        connection_class, host, port, base_path = approval_server_address()
+    except ValueError as e:
+        return approval_failed(f"Invalid APPROVAL_SERVER_URL: {e}")
+
+    def post(path: str, body: bytes, headers: dict) -> tuple[int, bytes]:
+        conn = connection_class(host, port, timeout=APPROVAL_TIMEOUT)
+        try:
+            conn.request('POST', base_path + path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    return do_approval(data, get_auth_token(), post)
+
+
+def hook_output(decision: str, reason: str = "") -> bytes:
+    """Claude CLI が期待する形式の出力を組み立てる"""
+    if decision == "allow" and not reason:
+        return ALLOW_OUTPUT
+
+    # 想定外の decision はそのまま埋め込まず deny 扱いにする（安全側）
+    if decision not in DECISIONS:
+        decision = "deny"
+    return (
+        b'{"hookSpecificOutput":{"hookEventName":"PreToolUse","permissionDecision":"'
+        + decision.encode('ascii') + b'","permissionDecisionReason":' + json_dumps(reason) + b'}}\n'
+    )
 
 
 def output_result(decision: str, reason: str = ""):
     """Claude CLI が期待する形式で結果を出力する"""
-    print(json.dumps({
-        "hookSpecificOutput": {
-            "hookEventName": "PreToolUse",
-            "permissionDecision": decision,
-            "permissionDecisionReason": reason
-        }
-    }))
+    # stdout には他に何も書かないので、TextIOWrapper を通さず1回の write(2) で出力する
+    os.write(1, hook_output(decision, reason))
 
 
 if __name__ == '__main__':
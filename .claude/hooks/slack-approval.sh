@@ -0,0 +1,47 @@
+#!/bin/bash
+# claps - Slack 承認 Hook（シム）
+# PreToolUse Hook として実行され、Hook入力を承認デーモンに UNIX ドメインソケット経由でそのまま転送する
+# 判定（即許可・承認サーバーへの問い合わせ）は常駐している approval-daemon.py が行い、
+# Hook のたびに Python を起動しない。デーモンに接続できなければ slack-approval.py に任せる
+
+# clapsタスクでなければ何もしない
+if [ -z "$CLAPS_TASK_ID" ]; then
+  exit 0
+fi
+
+HOOK_DIR=$(dirname "$0")
+
+# approval-daemon.py と同じソケットパス（所有者のみアクセス可能な ~/.claps 内）
+SOCKET_PATH="$HOME/.claps/${CLAPS_TASK_ID}.sock"
+
+# curl がない環境、またはデーモンが起動していなければ slack-approval.py に任せる
+if ! command -v curl >/dev/null 2>&1 || [ ! -S "$SOCKET_PATH" ]; then
+  exec python3 "$HOOK_DIR/slack-approval.py"
+fi
+
+# 標準入力からHook入力を読み取る（接続できなかった場合に slack-approval.py へ渡し直すため）
+INPUT=$(cat)
+
+# 承認待ちの最大時間（slack-approval.py の APPROVAL_TIMEOUT）+ 余裕
+printf '%s' "$INPUT" | curl -s --fail --unix-socket "$SOCKET_PATH" \
+  -H "Content-Type: application/json" \
+  -H "Expect:" \
+  --data-binary @- \
+  --max-time 310 \
+  http://localhost/hook
+STATUS=$?
+
+if [ $STATUS -eq 0 ]; then
+  exit 0
+fi
+
+# 接続できなければ（古いソケットが残っている等）slack-approval.py がデーモンを起動し直す
+# 応答なし・受信失敗（52/56）ではデーモンが既に承認を求めている可能性があるので、送り直さない
+if [ $STATUS -eq 7 ]; then
+  printf '%s' "$INPUT" | python3 "$HOOK_DIR/slack-approval.py"
+  exit $?
+fi
+
+# 送信後の失敗は承認を求め直さず deny（安全側）
+echo '{"hookSpecificOutput":{"hookEventName":"PreToolUse","permissionDecision":"deny","permissionDecisionReason":"Approval request failed: Approval daemon error"}}'
+exit 0
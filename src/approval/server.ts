@@ -22,6 +22,12 @@ let _authToken: string | undefined;
 const AUTH_TOKEN_DIR = path.join(os.homedir(), '.claps');
 const AUTH_TOKEN_FILE = path.join(AUTH_TOKEN_DIR, 'auth-token');
 
+// 承認デーモンの許可済みリクエストのキャッシュ（CLAPS_APPROVAL_CACHE=1 のとき、タスクごとに作成される）
+const APPROVAL_CACHE_DIR = path.join(AUTH_TOKEN_DIR, 'approvals');
+
+// Hook のサーキットブレーカーの状態（前回の停止中に開いたものを起動時に閉じる）
+const BREAKER_FILE = path.join(AUTH_TOKEN_DIR, 'breaker');
+
 // 通知ルーターへの参照（承認リクエスト送信用）
 let _router: NotificationRouter | undefined;
 
@@ -43,6 +49,18 @@ function GenerateAuthToken(): string {
   return token;
 }
 
+/**
+ * Hook のサーキットブレーカーの状態を削除する
+ * サーバーが停止していた間に開いたブレーカーで、起動後の承認リクエストが拒否されないようにする
+ */
+function ResetBreaker(): void {
+  try {
+    fs.rmSync(BREAKER_FILE, { force: true });
+  } catch (error) {
+    console.warn('Failed to reset circuit breaker:', error);
+  }
+}
+
 /**
  * 認証トークンを検証するミドルウェア
  * タイミング攻撃を防ぐため、定数時間比較を使用
@@ -108,6 +126,7 @@ export function InitApprovalServer(
 
   // 認証トークンを生成
   _authToken = GenerateAuthToken();
+  ResetBreaker();
 
   _app = express();
   _app.use(express.json());
@@ -536,10 +555,24 @@ export function SetCurrentTaskId(
   _allowedKeysForTask.clear();
 }
 
+/**
+ * 終了したタスクの承認キャッシュファイルを削除する
+ */
+function RemoveApprovalCache(taskId: string): void {
+  try {
+    fs.rmSync(path.join(APPROVAL_CACHE_DIR, `${taskId}.cache`), { force: true });
+  } catch (error) {
+    console.warn(`Failed to remove approval cache for task ${taskId}:`, error);
+  }
+}
+
 /**
  * 現在のタスクIDをクリアする
  */
 export function ClearCurrentTaskId(): void {
+  if (_currentTaskId) {
+    RemoveApprovalCache(_currentTaskId);
+  }
   _currentTaskId = undefined;
   _currentTaskMetadata = undefined;
   _currentRequestedByUserId = undefined;
@@ -4,6 +4,8 @@
  */
 
 import { spawn, type ChildProcess } from 'child_process';
+import * as fs from 'fs';
+import * as path from 'path';
 import { LoadCharacterPrompt } from '../character.js';
 
 // 出力コールバック
@@ -113,19 +115,24 @@ export class ClaudeRunner {
       args.push('--output-format', 'stream-json');
       args.push('--verbose');
 
-      // Claude CLI を起動
       // CLAUDE_PROJECT_DIR を明示的に設定してworktree側の.claude/設定を使用する
+      const env = {
+        ...process.env,
+        CLAUDE_PROJECT_DIR: options.workingDirectory,
+        CLAPS_TASK_ID: taskId,
+        APPROVAL_SERVER_URL: `http://localhost:${options.approvalServerPort ?? 3001}`,
+      };
+
+      // 承認デーモンを先に起動しておき、各 Hook は起動済みのデーモンへの転送だけで済ませる
+      this._startApprovalDaemon(options.workingDirectory, env);
+
+      // Claude CLI を起動
       const claudeProcess = spawn(
         'claude',
         args,
         {
           cwd: options.workingDirectory,
-          env: {
-            ...process.env,
-            CLAUDE_PROJECT_DIR: options.workingDirectory,
-            CLAPS_TASK_ID: taskId,
-            APPROVAL_SERVER_URL: `http://localhost:${options.approvalServerPort ?? 3001}`,
-          },
+          env,
           stdio: ['pipe', 'pipe', 'pipe'],
           shell: false,
         }
@@ -288,6 +295,29 @@ export class ClaudeRunner {
     return this._runningProcesses.has(taskId);
   }
 
+  /**
+   * タスクの承認デーモンを起動する
+   * デーモンは一定時間リクエストがなければ自ら終了し、既に起動済みならすぐに終了する
+   */
+  private _startApprovalDaemon(workingDirectory: string, env: NodeJS.ProcessEnv): void {
+    const daemonScript = path.join(workingDirectory, '.claude', 'hooks', 'approval-daemon.py');
+    if (!fs.existsSync(daemonScript)) {
+      return;
+    }
+
+    const daemon = spawn('python3', [daemonScript], {
+      cwd: workingDirectory,
+      env,
+      stdio: 'ignore',
+      detached: true,
+    });
+    daemon.on('error', (error) => {
+      // 起動できなくても Hook が必要に応じて起動するので、タスクは続行する
+      console.warn(`Failed to start approval daemon: ${error.message}`);
+    });
+    daemon.unref();
+  }
+
   /**
    * プロセスを強制終了する
    */
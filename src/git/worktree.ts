@@ -16,7 +16,7 @@ const CLAPS_APPROVAL_HOOK_CONFIG = {
   hooks: [
     {
       type: 'command',
-      command: 'python3 "$CLAUDE_PROJECT_DIR"/.claude/hooks/slack-approval.py',
+      command: 'bash "$CLAUDE_PROJECT_DIR"/.claude/hooks/slack-approval.sh',
       timeout: 320,
     },
   ],
@@ -364,13 +364,27 @@ export async function InjectClaudeSettings(worktreeDir: string): Promise<void> {
   }
   const preToolUseHooks = hooks['PreToolUse'] as Array<Record<string, unknown>>;
 
+  // 以前の承認hook（slack-approval.py を直接実行する設定）はシムに置き換える
+  const legacyApprovalIndex = preToolUseHooks.findIndex(
+    (hook) => {
+      const hookList = hook['hooks'] as Array<Record<string, unknown>> | undefined;
+      return hookList?.some((h) => {
+        const cmd = h['command'] as string | undefined;
+        return cmd?.includes('slack-approval.py');
+      });
+    }
+  );
+  if (legacyApprovalIndex !== -1) {
+    preToolUseHooks.splice(legacyApprovalIndex, 1);
+  }
+
   // claps の承認hook が既に存在するか確認（コマンド文字列で判定）
   const hasClapsApprovalHook = preToolUseHooks.some(
     (hook) => {
       const hookList = hook['hooks'] as Array<Record<string, unknown>> | undefined;
       return hookList?.some((h) => {
         const cmd = h['command'] as string | undefined;
-        return cmd?.includes('slack-approval.py');
+        return cmd?.includes('slack-approval.sh');
       });
     }
   );
@@ -404,7 +418,7 @@ export async function InjectClaudeSettings(worktreeDir: string): Promise<void> {
   const __dirname = path.dirname(__filename);
   // dist/git/worktree.js -> ../../.claude/hooks/
   const clapsRoot = path.resolve(__dirname, '..', '..');
-  const hookFiles = ['slack-approval.py', 'tool-notify.sh'];
+  const hookFiles = ['slack-approval.sh', 'slack-approval.py', 'approval-daemon.py', 'tool-notify.sh'];
 
   for (const hookFile of hookFiles) {
     const sourceHookPath = path.join(clapsRoot, '.claude', 'hooks', hookFile);